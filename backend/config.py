@@ -7,3 +7,6 @@ MONGO_URL = os.getenv("MONGO_URL")
 JWT_SECRET = os.getenv("JWT_SECRET")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+DRAFT_MAX_BYTES = int(os.getenv("DRAFT_MAX_BYTES", str(8 * 1024 * 1024)))
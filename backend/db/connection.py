@@ -1,4 +1,4 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 from config import MONGO_URL
 import sys
 
@@ -9,6 +9,7 @@ if not MONGO_URL:
 try:
     client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=5000)
     db = client.smart_blog_db
+    avatars_fs = AsyncIOMotorGridFSBucket(db, bucket_name="avatars")
     print("MongoDB connection initialized", file=sys.stderr)
 except Exception as e:
     print(f"ERROR: Failed to connect to MongoDB: {e}", file=sys.stderr)
@@ -1,8 +1,11 @@
 import os
 from fastapi import FastAPI
-from routes import posts, ai, auth, comments, users
+from routes import posts, ai, auth, comments, users, drafts
 from fastapi.middleware.cors import CORSMiddleware
-from config import ALLOWED_ORIGINS
+from config import ALLOWED_ORIGINS, COMPRESSION_MIN_SIZE
+from utils.compression import CompressionMiddleware
+from utils.images import shutdown_pool
+from utils.draft_sync import close_all_sessions
 
 app = FastAPI(title="Smart Blog Editor API", version="1.0.0")
 
@@ -23,6 +26,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip / brotli / zstd for large Lexical JSON payloads, negotiated via Accept-Encoding
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 @app.get("/")
 async def root():
     return {
@@ -31,12 +37,18 @@ async def root():
         "status": "running"
     }
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_all_sessions()
+    shutdown_pool()
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 app.include_router(auth.router)
 app.include_router(posts.router)
+app.include_router(drafts.router)
 app.include_router(ai.router)
 app.include_router(comments.router)
 app.include_router(users.router)
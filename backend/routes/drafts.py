@@ -0,0 +1,117 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from utils.auth import get_user_from_token
+from utils.draft_sync import open_session, close_session
+import asyncio
+import json
+import sys
+
+router = APIRouter(prefix="/api", tags=["drafts"])
+
+AUTH_TIMEOUT = 10  # seconds a client has to send its auth message after connecting
+
+
+async def receive_object(websocket: WebSocket) -> dict:
+    """Next JSON object from the client; raises ValueError with a client-facing reason if it is malformed"""
+    frame = await websocket.receive()
+    if frame["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(frame.get("code", status.WS_1000_NORMAL_CLOSURE))
+    if frame.get("text") is None:
+        raise ValueError("Binary frames are not supported")
+
+    try:
+        message = json.loads(frame["text"])
+    except ValueError:
+        raise ValueError("Invalid JSON")
+
+    if not isinstance(message, dict):
+        raise ValueError("Message must be an object")
+    return message
+
+
+async def authenticate(websocket: WebSocket):
+    # The token comes in the first message rather than the URL so it never lands in access logs
+    try:
+        message = await asyncio.wait_for(receive_object(websocket), AUTH_TIMEOUT)
+        if message.get("type") != "auth":
+            return None
+        return await get_user_from_token(str(message.get("token", "")))
+    except (asyncio.TimeoutError, ValueError, HTTPException):
+        return None
+
+
+async def close_with_error(websocket: WebSocket, detail: str, code: int):
+    await websocket.send_json({"type": "error", "detail": detail})
+    await websocket.close(code=code)
+
+
+# 🟢 REAL-TIME DRAFT SYNC (authenticates once, replaces repeated PATCH autosaves)
+@router.websocket("/posts/{id}/sync")
+async def sync_draft(websocket: WebSocket, id: str):
+    await websocket.accept()
+
+    try:
+        current_user = await authenticate(websocket)
+    except WebSocketDisconnect:
+        return
+    if not current_user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    session, client = await open_session(id, current_user["id"])
+    if not session:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    try:
+        await websocket.send_json(session.snapshot("init"))
+
+        while True:
+            try:
+                message = await receive_object(websocket)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            # Post was deleted, or the draft can never be saved: nothing more to sync
+            if session.closed:
+                await close_with_error(websocket, session.closed, status.WS_1008_POLICY_VIOLATION)
+                return
+
+            # Draft was reloaded from Mongo (a PATCH or another worker wrote first),
+            # or the client edited a stale revision: send it the current state
+            if client.stale or message.get("baseRev") != session.revision:
+                client.stale = False
+                await websocket.send_json(session.snapshot("resync"))
+                continue
+
+            try:
+                rev = session.apply(message.get("ops"))
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            # Stop reading from the socket until the backlog is persisted
+            if session.needs_flush:
+                try:
+                    await session.flush()
+                except Exception as e:
+                    # The edits stay in the session and are retried; the client reconnects to resume
+                    print(f"ERROR flushing draft {id}: {str(e)}", file=sys.stderr)
+                    session.schedule_flush()
+                    await close_with_error(websocket, "Could not save draft", status.WS_1011_INTERNAL_ERROR)
+                    return
+
+                if session.closed:
+                    await close_with_error(websocket, session.closed, status.WS_1008_POLICY_VIOLATION)
+                    return
+
+                if client.stale:
+                    client.stale = False
+                    await websocket.send_json(session.snapshot("resync"))
+                    continue
+
+            await websocket.send_json({"type": "ack", "rev": rev, "savedRev": session.persisted_revision})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await close_session(session, client)
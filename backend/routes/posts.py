@@ -19,6 +19,7 @@ async def create_post(post: PostCreate, current_user: dict = Depends(get_current
         "content": post.content,
         "authorId": current_user["id"],
         "status": "draft",
+        "revision": 0,
         "createdAt": datetime.utcnow(),
         "updatedAt": datetime.utcnow(),
         "publishedAt": None
@@ -51,9 +52,10 @@ async def update_post(id: str, post: PostUpdate, current_user: dict = Depends(ge
     if post.title is not None:
         updates["title"] = post.title
 
+    # Bumping revision makes open draft-sync sessions reload instead of overwriting this save
     result = await db.posts.update_one(
         {"id": id, "authorId": current_user["id"]},
-        {"$set": updates}
+        {"$set": updates, "$inc": {"revision": 1}}
     )
 
     if result.matched_count == 0:
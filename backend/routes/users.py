@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
-from db.connection import db
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.datastructures import UploadFile
+from gridfs.errors import NoFile
+from db.connection import db, avatars_fs
+from config import AVATAR_MAX_BYTES
 from utils.auth import get_current_user
+from utils.http_cache import etag_matches
+from utils.images import generate_thumbnail, AVATAR_FORMATS, INVALID_IMAGE_ERRORS, THUMBNAIL_CONTENT_TYPE
+from concurrent.futures.process import BrokenProcessPool
 from pydantic import BaseModel
+import asyncio
+import os
+import tempfile
+import uuid
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+AVATAR_VARIANTS = ("thumb", "original")
+UPLOAD_CHUNK_SIZE = 256 * 1024
+MULTIPART_OVERHEAD_BYTES = 16 * 1024  # boundaries and part headers around the file
+
 
 class ProfileUpdate(BaseModel):
     full_name: str | None = None
@@ -13,7 +28,7 @@ class ProfileUpdate(BaseModel):
 
 # 🟢 GET USER PROFILE
 @router.get("/profile")
-async def get_profile(current_user: dict = Depends(get_current_user)):
+async def get_profile(request: Request, current_user: dict = Depends(get_current_user)):
     user = await db.users.find_one({"id": current_user["id"]})
     
     if not user:
@@ -24,13 +39,13 @@ async def get_profile(current_user: dict = Depends(get_current_user)):
         "full_name": user.get("name", ""),
         "email": user.get("email"),
         "bio": user.get("bio", ""),
-        "avatar": user.get("avatar", "")
+        "avatar": avatar_url(request, user)
     }
 
 
 # 🟢 UPDATE USER PROFILE
 @router.patch("/profile")
-async def update_profile(profile: ProfileUpdate, current_user: dict = Depends(get_current_user)):
+async def update_profile(profile: ProfileUpdate, request: Request, current_user: dict = Depends(get_current_user)):
     update_data = {}
     
     if profile.full_name is not None:
@@ -57,6 +72,149 @@ async def update_profile(profile: ProfileUpdate, current_user: dict = Depends(ge
         "full_name": updated_user.get("name", ""),
         "email": updated_user.get("email"),
         "bio": updated_user.get("bio", ""),
-        "avatar": updated_user.get("avatar", ""),
+        "avatar": avatar_url(request, updated_user),
         "message": "Profile updated successfully"
     }
+
+
+def avatar_url(request: Request, user: dict) -> str:
+    # Only the avatar id lives on the user document; the image bytes stay in GridFS.
+    # Absolute, because the SPA is served from a different origin than the API.
+    avatar_id = user.get("avatarId")
+    if avatar_id:
+        return str(request.url_for("get_avatar", avatar_id=avatar_id))
+    return user.get("avatar", "")
+
+
+async def delete_avatar_files(avatar_id: str):
+    # GridFS indexes files by filename, so look up both variants by name
+    filenames = [f"{avatar_id}-{variant}" for variant in AVATAR_VARIANTS]
+    cursor = avatars_fs.find({"filename": {"$in": filenames}})
+    async for grid_file in cursor:
+        await avatars_fs.delete(grid_file._id)
+
+
+# 🟢 UPLOAD AVATAR (copied from the multipart spool into GridFS, thumbnail built in a process pool)
+@router.post("/avatar")
+async def upload_avatar(request: Request, current_user: dict = Depends(get_current_user)):
+    # Checked before the body is read so oversized uploads are never spooled to disk
+    content_length = request.headers.get("content-length")
+    if content_length is None or not content_length.isdigit():
+        raise HTTPException(status_code=411, detail="Content-Length header is required")
+    if int(content_length) > AVATAR_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail="Avatar is too large")
+
+    form = await request.form(max_files=1, max_fields=0)
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="Missing 'file' upload")
+
+        if file.content_type not in AVATAR_FORMATS.values():
+            raise HTTPException(status_code=400, detail="Avatar must be a JPEG, PNG, WEBP or GIF image")
+
+        avatar_id = uuid.uuid4().hex
+        metadata = {
+            "avatarId": avatar_id,
+            "userId": current_user["id"],
+            "variant": "original"
+        }
+        grid_in = avatars_fs.open_upload_stream(f"{avatar_id}-original", metadata=metadata)
+        tmp = tempfile.NamedTemporaryFile(delete=False)
+
+        try:
+            size = 0
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > AVATAR_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Avatar is too large")
+                await grid_in.write(chunk)
+                await asyncio.to_thread(tmp.write, chunk)
+
+            if size == 0:
+                raise HTTPException(status_code=400, detail="Avatar file is empty")
+
+            await asyncio.to_thread(tmp.close)
+            try:
+                thumbnail, content_type = await generate_thumbnail(tmp.name)
+            except BrokenProcessPool:
+                raise HTTPException(status_code=503, detail="Image processing is temporarily unavailable, please retry")
+            except INVALID_IMAGE_ERRORS:
+                raise HTTPException(status_code=400, detail="Uploaded file is not a valid JPEG, PNG, WEBP or GIF image")
+
+            # Served with the type Pillow detected, not the one the client declared
+            await grid_in.set("metadata", {**metadata, "contentType": content_type})
+            await grid_in.close()
+        except Exception:
+            await grid_in.abort()
+            raise
+        finally:
+            tmp.close()
+            os.unlink(tmp.name)
+    finally:
+        await form.close()
+
+    try:
+        await avatars_fs.upload_from_stream(
+            f"{avatar_id}-thumb",
+            thumbnail,
+            metadata={
+                "avatarId": avatar_id,
+                "userId": current_user["id"],
+                "variant": "thumb",
+                "contentType": THUMBNAIL_CONTENT_TYPE
+            }
+        )
+
+        previous = await db.users.find_one_and_update(
+            {"id": current_user["id"]},
+            {"$set": {"avatarId": avatar_id}, "$unset": {"avatar": ""}},
+            projection={"avatarId": 1}
+        )
+    except Exception:
+        await delete_avatar_files(avatar_id)
+        raise
+
+    if not previous:
+        await delete_avatar_files(avatar_id)
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if previous.get("avatarId"):
+        await delete_avatar_files(previous["avatarId"])
+
+    return {
+        "avatar": avatar_url(request, {"avatarId": avatar_id}),
+        "message": "Avatar updated successfully"
+    }
+
+
+# 🟢 PUBLIC: SERVE AVATAR (immutable per upload, ETag-aware)
+@router.get("/avatars/{avatar_id}")
+async def get_avatar(avatar_id: str, request: Request, variant: str = "thumb"):
+    if variant not in AVATAR_VARIANTS:
+        raise HTTPException(status_code=400, detail="Variant must be 'thumb' or 'original'")
+
+    etag = f'"{avatar_id}-{variant}"'
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+
+    # Looked up first so a conditional request for a missing avatar still gets a 404
+    try:
+        grid_out = await avatars_fs.open_download_stream_by_name(f"{avatar_id}-{variant}")
+    except NoFile:
+        raise HTTPException(status_code=404, detail="Avatar not found")
+
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    async def stream():
+        while chunk := await grid_out.readchunk():
+            yield chunk
+
+    return StreamingResponse(
+        stream(),
+        media_type=grid_out.metadata.get("contentType", "application/octet-stream"),
+        headers={**cache_headers, "Content-Length": str(grid_out.length)}
+    )
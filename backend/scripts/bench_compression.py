@@ -0,0 +1,137 @@
+"""
+Benchmark response compression on a get_published_posts-shaped payload.
+
+Reports compressed size, compress/decompress time and the estimated
+end-to-end latency (compress + transfer + decompress) per encoding at a
+few link speeds. Run from the backend directory:
+
+    python scripts/bench_compression.py --posts 20 --paragraphs 30
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compression import ENCODERS, brotli, zstandard
+
+WORDS = (
+    "editor draft publish lexical node paragraph heading table equation summary grammar "
+    "writing story reader author comment mongo fastapi react latency payload cache "
+    "the a of and to in is that for on with as it was by this be are from at"
+).split()
+
+LINK_SPEEDS_MBIT = (5, 20, 100)
+
+
+def _text_node(text: str, fmt: int = 0) -> dict:
+    return {"detail": 0, "format": fmt, "mode": "normal", "style": "", "text": text, "type": "text", "version": 1}
+
+
+def _block(kind: str, children: list, **extra) -> dict:
+    return {"children": children, "direction": "ltr", "format": "", "indent": 0, "type": kind, "version": 1, **extra}
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+
+def make_lexical_content(rng: random.Random, paragraphs: int) -> str:
+    children = []
+    for i in range(paragraphs):
+        if i % 8 == 0:
+            children.append(_block("heading", [_text_node(_sentence(rng))], tag="h2"))
+        elif i % 5 == 0:
+            items = [_block("listitem", [_text_node(_sentence(rng))], value=n + 1) for n in range(3)]
+            children.append(_block("list", items, listType="bullet", start=1, tag="ul"))
+        else:
+            nodes = [_text_node(_sentence(rng), fmt=rng.choice((0, 0, 1, 2))) for _ in range(rng.randint(1, 4))]
+            children.append(_block("paragraph", nodes, textFormat=0))
+    return json.dumps({"root": _block("root", children)})
+
+
+def make_published_posts(posts: int, paragraphs: int) -> bytes:
+    rng = random.Random(42)
+    now = datetime(2026, 1, 1)
+    payload = []
+    for i in range(posts):
+        author_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        published = (now - timedelta(days=i)).isoformat()
+        payload.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": _sentence(rng),
+            "content": make_lexical_content(rng, paragraphs),
+            "authorId": author_id,
+            "author": {"id": author_id, "full_name": "Author %d" % (i % 5)},
+            "status": "published",
+            "createdAt": published,
+            "updatedAt": published,
+            "publishedAt": published
+        })
+    # Same separators as FastAPI's JSONResponse
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+DECODERS = {"gzip": gzip.decompress}
+if brotli is not None:
+    DECODERS["br"] = brotli.decompress
+if zstandard is not None:
+    DECODERS["zstd"] = lambda data: zstandard.ZstdDecompressor().decompress(data)
+
+
+def _median_ms(fn, arg, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _transfer_ms(size: int, mbit: int) -> float:
+    return size * 8 / (mbit * 1_000_000) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    body = make_published_posts(args.posts, args.paragraphs)
+    print(f"payload: {args.posts} posts, {len(body):,} bytes uncompressed")
+
+    missing = [name for name, lib in (("br", brotli), ("zstd", zstandard)) if lib is None]
+    if missing:
+        print(f"skipping {', '.join(missing)} (install brotli / zstandard)")
+
+    speed_cols = "".join(f"{f'@{mbit}Mbit ms':>13}" for mbit in LINK_SPEEDS_MBIT)
+    print(f"\n{'encoding':<10}{'bytes':>10}{'ratio':>8}{'comp ms':>10}{'decomp ms':>11}{speed_cols}")
+
+    rows = [("identity", body, 0.0, 0.0)]
+    for name, encoder in ENCODERS.items():
+        compressed = encoder(body)
+        rows.append((
+            name,
+            compressed,
+            _median_ms(encoder, body, args.runs),
+            _median_ms(DECODERS[name], compressed, args.runs)
+        ))
+
+    for name, data, comp_ms, decomp_ms in rows:
+        latencies = "".join(
+            f"{comp_ms + _transfer_ms(len(data), mbit) + decomp_ms:>13.2f}" for mbit in LINK_SPEEDS_MBIT
+        )
+        print(f"{name:<10}{len(data):>10,}{len(body) / len(data):>8.1f}{comp_ms:>10.2f}{decomp_ms:>11.2f}{latencies}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import asyncio
+import gzip
+
+import pytest
+
+from utils.compression import ENCODERS, CompressionMiddleware, choose_encoding
+
+
+def test_gzip_only():
+    assert choose_encoding("gzip") == "gzip"
+
+
+def test_no_header_or_unsupported_encodings():
+    assert choose_encoding("") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("deflate, compress") is None
+
+
+def test_q_zero_disables_encoding():
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("gzip;q=0, deflate") is None
+
+
+def test_wildcard_matches_supported_encodings():
+    assert choose_encoding("*") == next(iter(ENCODERS))
+    assert choose_encoding("*;q=0") is None
+
+
+def test_explicit_q_overrides_wildcard():
+    assert choose_encoding("*, gzip;q=0") == next((name for name in ENCODERS if name != "gzip"), None)
+
+
+def test_malformed_q_is_treated_as_zero():
+    assert choose_encoding("gzip;q=abc") is None
+
+
+def test_case_and_whitespace_are_ignored():
+    assert choose_encoding("  GZIP ; q=0.8 ") == "gzip"
+
+
+def test_highest_q_wins():
+    if "br" not in ENCODERS:
+        pytest.skip("brotli not installed")
+    assert choose_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert choose_encoding("gzip;q=0.5, br;q=0.9") == "br"
+
+
+def test_server_preference_breaks_ties():
+    if "zstd" not in ENCODERS or "br" not in ENCODERS:
+        pytest.skip("brotli / zstandard not installed")
+    assert choose_encoding("gzip, deflate, br, zstd") == "zstd"
+
+
+def test_gzip_encoder_round_trips():
+    body = b'{"content":"' + b"lexical " * 500 + b'"}'
+    assert gzip.decompress(ENCODERS["gzip"](body)) == body
+
+
+def test_q_is_read_from_any_parameter_position():
+    assert choose_encoding("gzip;level=1;q=0") is None
+    assert choose_encoding("gzip; level=1 ; Q = 0.5") == "gzip"
+
+
+def run_middleware(body, headers=None, accept_encoding=b"gzip", more_body=False, **options):
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": headers if headers is not None else [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+        if more_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app, **options)(scope, None, send))
+    return sent
+
+
+def header_dict(message):
+    return {k: v for k, v in message["headers"]}
+
+
+LARGE_BODY = b'{"content":"' + b"lexical " * 500 + b'"}'
+
+
+def test_middleware_compresses_and_rewrites_headers():
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(LARGE_BODY)).encode()),
+        (b"vary", b"Origin"),
+    ]
+    start, body = run_middleware(LARGE_BODY, headers=headers)
+    sent_headers = header_dict(start)
+
+    assert sent_headers[b"content-encoding"] == b"gzip"
+    assert sent_headers[b"vary"] == b"Origin, Accept-Encoding"
+    assert sent_headers[b"content-length"] == str(len(body["body"])).encode()
+    assert [k for k, _ in start["headers"]].count(b"content-length") == 1
+    assert gzip.decompress(body["body"]) == LARGE_BODY
+
+
+def test_middleware_compresses_offloaded_bodies():
+    _, body = run_middleware(LARGE_BODY, offload_size=1)
+    assert gzip.decompress(body["body"]) == LARGE_BODY
+
+
+def test_middleware_passes_small_bodies_through():
+    small = b'{"ok":true}'
+    start, body = run_middleware(small)
+    assert b"content-encoding" not in header_dict(start)
+    assert body["body"] == small
+
+
+def test_middleware_passes_streamed_bodies_through():
+    messages = run_middleware(LARGE_BODY, more_body=True)
+    assert b"content-encoding" not in header_dict(messages[0])
+    assert [m["body"] for m in messages[1:]] == [LARGE_BODY, b""]
+
+
+def test_middleware_keeps_existing_content_encoding():
+    encoded = gzip.compress(LARGE_BODY)
+    headers = [(b"content-type", b"application/json"), (b"content-encoding", b"gzip")]
+    start, body = run_middleware(encoded, headers=headers, accept_encoding=b"gzip")
+    assert header_dict(start)[b"content-encoding"] == b"gzip"
+    assert body["body"] == encoded
+
+
+def test_middleware_skips_non_text_types():
+    headers = [(b"content-type", b"image/png")]
+    start, body = run_middleware(LARGE_BODY, headers=headers)
+    assert b"content-encoding" not in header_dict(start)
+    assert body["body"] == LARGE_BODY
+
+
+def test_middleware_skips_when_client_accepts_nothing():
+    start, body = run_middleware(LARGE_BODY, accept_encoding=b"identity")
+    assert b"content-encoding" not in header_dict(start)
+    assert body["body"] == LARGE_BODY
@@ -0,0 +1,99 @@
+import pytest
+
+from utils.draft_ops import MAX_OPS_PER_MESSAGE, apply_ops
+
+
+def splice(index, delete=0, insert=""):
+    return {"type": "splice", "index": index, "delete": delete, "insert": insert}
+
+
+def test_splice_insert_delete_and_replace_text():
+    assert apply_ops("t", "hello world", [splice(5, 6, " there")]) == ("t", "hello there")
+    assert apply_ops("t", "abc", [splice(3, 0, "d")]) == ("t", "abcd")
+    assert apply_ops("t", "abc", [splice(0, 3)]) == ("t", "")
+
+
+def test_ops_in_a_batch_apply_in_order():
+    ops = [splice(0, 0, "ab"), splice(2, 0, "cd"), {"type": "title", "value": "New"}]
+    assert apply_ops("Old", "", ops) == ("New", "abcd")
+
+
+def test_replace_then_splice():
+    ops = [{"type": "replace", "content": "fresh"}, splice(5, 0, "!")]
+    assert apply_ops("t", "stale", ops) == ("t", "fresh!")
+
+
+def test_offsets_are_utf16_code_units():
+    content = '{"text":"😀abc"}'
+    # JS: content.indexOf("a") === 11, because the emoji is two UTF-16 code units
+    assert apply_ops("t", content, [splice(11, 1, "X")]) == ("t", '{"text":"😀Xbc"}')
+
+
+def test_end_bound_is_in_utf16_code_units():
+    content = "😀"
+    assert apply_ops("t", content, [splice(2, 0, "!")]) == ("t", "😀!")
+    with pytest.raises(ValueError):
+        apply_ops("t", content, [splice(3)])
+
+
+def test_splitting_a_surrogate_pair_is_rejected():
+    with pytest.raises(ValueError):
+        apply_ops("t", "😀", [splice(1, 0, "x")])
+
+
+def test_surrogate_pair_sent_across_ops_in_one_batch():
+    ops = [splice(0, 0, "\ud83d"), splice(1, 0, "\ude00")]
+    assert apply_ops("t", "", ops) == ("t", "😀")
+
+
+@pytest.mark.parametrize("op", [
+    splice(-1),
+    splice(0, -1),
+    splice(2, 2),
+    splice(4),
+    splice("0"),
+    splice(True),
+    splice(0, 0, 5),
+])
+def test_invalid_splices_are_rejected(op):
+    with pytest.raises(ValueError):
+        apply_ops("t", "abc", [op])
+
+
+@pytest.mark.parametrize("ops", [
+    None,
+    [],
+    ["splice"],
+    [{"type": "unknown"}],
+    [{"type": "title"}],
+    [{"type": "replace", "content": {"root": {}}}],
+    [splice(0)] * (MAX_OPS_PER_MESSAGE + 1),
+])
+def test_invalid_batches_are_rejected(ops):
+    with pytest.raises(ValueError):
+        apply_ops("t", "abc", ops)
+
+
+def test_non_text_content_requires_replace():
+    with pytest.raises(ValueError):
+        apply_ops("t", {"root": {}}, [splice(0)])
+    assert apply_ops("t", {"root": {}}, [{"type": "title", "value": "x"}]) == ("x", {"root": {}})
+    assert apply_ops("t", {"root": {}}, [{"type": "replace", "content": "{}"}]) == ("t", "{}")
+
+
+def test_result_over_max_bytes_is_rejected():
+    assert apply_ops("ab", "cd", [splice(2, 0, "e")], max_bytes=5) == ("ab", "cde")
+    with pytest.raises(ValueError):
+        apply_ops("ab", "cd", [splice(2, 0, "ef")], max_bytes=5)
+
+
+def test_max_bytes_counts_utf8():
+    # "é" is 2 UTF-8 bytes but a single UTF-16 code unit
+    with pytest.raises(ValueError):
+        apply_ops("", "", [{"type": "replace", "content": "ééé"}], max_bytes=5)
+
+
+def test_growth_within_a_batch_stops_early():
+    ops = [splice(0, 0, "x" * 10)] * 3 + [splice(0, 30)]
+    with pytest.raises(ValueError):
+        apply_ops("", "", ops, max_bytes=10)
@@ -0,0 +1,216 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("dotenv")
+
+from pymongo.errors import AutoReconnect, DocumentTooLarge
+
+# Stand-in for db.connection so importing draft_sync needs neither Motor nor a MONGO_URL;
+# each test swaps in a FakeDB below
+sys.modules.setdefault("db.connection", types.SimpleNamespace(db=None))
+
+from utils import draft_sync
+from utils.draft_sync import DraftSession, close_session, open_session
+
+
+def matches(doc, query):
+    for key, expected in query.items():
+        value = doc.get(key)
+        if isinstance(expected, dict) and "$in" in expected:
+            if value not in expected["$in"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class FakePosts:
+    def __init__(self, docs):
+        self.docs = docs
+        self.fail_with = None
+        self.writes = 0
+
+    async def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return dict(doc)
+        return None
+
+    async def update_one(self, query, update):
+        if self.fail_with:
+            raise self.fail_with
+        self.writes += 1
+        for doc in self.docs:
+            if matches(doc, query):
+                doc.update(update["$set"])
+                return types.SimpleNamespace(matched_count=1)
+        return types.SimpleNamespace(matched_count=0)
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    posts = FakePosts([{"id": "p1", "authorId": "u1", "title": "Title", "content": "hello", "revision": 3}])
+    monkeypatch.setattr(draft_sync, "db", types.SimpleNamespace(posts=posts))
+    monkeypatch.setattr(draft_sync, "FLUSH_INTERVAL", 0)
+    monkeypatch.setattr(draft_sync, "_sessions", {})
+    return posts
+
+
+def splice(index, delete=0, insert=""):
+    return {"type": "splice", "index": index, "delete": delete, "insert": insert}
+
+
+def session_for(posts):
+    return DraftSession(dict(posts.docs[0]))
+
+
+def test_apply_leaves_state_untouched_on_bad_batch(posts):
+    session = session_for(posts)
+    session.apply([splice(5, 0, "!")])
+    before = (session.title, session.content, session.revision, session.pending_ops)
+
+    with pytest.raises(ValueError):
+        session.apply([{"type": "title", "value": "Changed"}, splice(0, 0, "x"), splice(99)])
+
+    assert (session.title, session.content, session.revision, session.pending_ops) == before
+
+
+def test_apply_enforces_draft_max_bytes(posts, monkeypatch):
+    monkeypatch.setattr(draft_sync, "DRAFT_MAX_BYTES", 12)
+    session = session_for(posts)
+    with pytest.raises(ValueError):
+        session.apply([{"type": "replace", "content": "x" * 20}])
+    assert session.revision == 3
+
+
+def test_flush_writes_when_revision_matches(posts):
+    session = session_for(posts)
+    session.apply([splice(5, 0, " world")])
+    session.apply([{"type": "title", "value": "New"}])
+
+    asyncio.run(session.flush())
+
+    assert posts.docs[0]["content"] == "hello world"
+    assert posts.docs[0]["title"] == "New"
+    assert posts.docs[0]["revision"] == 5
+    assert session.is_persisted and session.pending_ops == 0
+
+
+def test_flush_matches_posts_without_revision(posts):
+    del posts.docs[0]["revision"]
+    session = session_for(posts)
+    assert session.revision == 0
+    session.apply([splice(0, 0, ">")])
+
+    asyncio.run(session.flush())
+
+    assert posts.docs[0]["content"] == ">hello"
+    assert posts.docs[0]["revision"] == 1
+
+
+def test_flush_after_external_write_reloads_and_marks_clients_stale(posts):
+    session = session_for(posts)
+    client = draft_sync.DraftClient()
+    session.clients.add(client)
+    session.apply([splice(0, 0, "mine ")])
+
+    # A PATCH (or a session in another worker) saved first
+    posts.docs[0].update({"content": "theirs", "revision": 4})
+
+    asyncio.run(session.flush())
+
+    assert posts.docs[0]["content"] == "theirs"
+    assert (session.content, session.revision, session.persisted_revision) == ("theirs", 4, 4)
+    assert session.pending_ops == 0
+    assert client.stale
+
+
+def test_flush_after_post_deleted_closes_session(posts):
+    session = session_for(posts)
+    session.apply([splice(0, 0, "x")])
+    posts.docs.clear()
+
+    asyncio.run(session.flush())
+
+    assert session.closed == "Post not found"
+    assert session.is_persisted
+
+
+def test_document_too_large_closes_session_without_retry(posts):
+    session = session_for(posts)
+    session.apply([splice(0, 0, "x")])
+    posts.fail_with = DocumentTooLarge("too big")
+
+    asyncio.run(session.flush())
+
+    assert session.closed
+    assert session.is_persisted and session.pending_ops == 0
+    assert posts.docs[0]["content"] == "hello"
+
+
+def test_transient_flush_error_is_raised_and_keeps_edits(posts):
+    session = session_for(posts)
+    session.apply([splice(0, 0, "x")])
+    posts.fail_with = AutoReconnect("primary stepped down")
+
+    with pytest.raises(AutoReconnect):
+        asyncio.run(session.flush())
+
+    assert not session.is_persisted
+    assert session.content == "xhello"
+    assert session.closed is None
+
+
+def test_close_session_flushes_and_releases(posts):
+    async def scenario():
+        session, client = await open_session("p1", "u1")
+        session.apply([splice(0, 0, "x")])
+        await close_session(session, client)
+        return session
+
+    session = asyncio.run(scenario())
+
+    assert posts.docs[0]["content"] == "xhello"
+    assert "p1" not in draft_sync._sessions
+    assert session._flusher is None
+
+
+def test_close_session_keeps_session_until_failed_flush_succeeds(posts):
+    async def scenario():
+        session, client = await open_session("p1", "u1")
+        session.apply([splice(0, 0, "x")])
+        posts.fail_with = AutoReconnect("primary stepped down")
+
+        await close_session(session, client)
+        assert draft_sync._sessions.get("p1") is session
+
+        # A reconnect while the save is pending sees the unsaved edit, not stale Mongo state
+        reopened, other = await open_session("p1", "u1")
+        assert reopened is session and reopened.content == "xhello"
+        await close_session(reopened, other)
+
+        posts.fail_with = None
+        for _ in range(100):
+            if "p1" not in draft_sync._sessions:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    assert posts.docs[0]["content"] == "xhello"
+    assert "p1" not in draft_sync._sessions
+
+
+def test_open_session_rejects_other_authors(posts):
+    async def scenario():
+        owner = await open_session("p1", "u1")
+        stranger = await open_session("p1", "u2")
+        missing = await open_session("nope", "u1")
+        await close_session(*owner)
+        return stranger, missing
+
+    assert asyncio.run(scenario()) == ((None, None), (None, None))
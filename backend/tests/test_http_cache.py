@@ -0,0 +1,25 @@
+from utils.http_cache import etag_matches
+
+ETAG = '"abc123-thumb"'
+
+
+def test_exact_match():
+    assert etag_matches(ETAG, ETAG)
+
+
+def test_weak_validator_matches():
+    assert etag_matches(f"W/{ETAG}", ETAG)
+
+
+def test_match_in_list():
+    assert etag_matches(f'"other", {ETAG} ,"more"', ETAG)
+
+
+def test_wildcard_matches():
+    assert etag_matches("*", ETAG)
+
+
+def test_no_match():
+    assert not etag_matches("", ETAG)
+    assert not etag_matches('"abc123-original"', ETAG)
+    assert not etag_matches("abc123-thumb", ETAG)
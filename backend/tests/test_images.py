@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from utils.images import (
+    INVALID_IMAGE_ERRORS,
+    MAX_AVATAR_PIXELS,
+    THUMBNAIL_FORMAT,
+    THUMBNAIL_SIZE,
+    _make_thumbnail,
+)
+
+
+def save_image(tmp_path, name, size, fmt, mode="RGB"):
+    path = tmp_path / name
+    Image.new(mode, size, "white").save(path, format=fmt)
+    return str(path)
+
+
+@pytest.mark.parametrize("fmt, content_type", [
+    ("JPEG", "image/jpeg"),
+    ("PNG", "image/png"),
+    ("WEBP", "image/webp"),
+    ("GIF", "image/gif"),
+])
+def test_thumbnail_is_webp_within_bounds(tmp_path, fmt, content_type):
+    path = save_image(tmp_path, "avatar", (1200, 600), fmt, mode="P" if fmt == "GIF" else "RGB")
+
+    thumbnail, detected = _make_thumbnail(path, THUMBNAIL_SIZE)
+
+    assert detected == content_type
+    with Image.open(io.BytesIO(thumbnail)) as img:
+        assert img.format == THUMBNAIL_FORMAT
+        assert max(img.size) == THUMBNAIL_SIZE
+        assert img.size == (THUMBNAIL_SIZE, THUMBNAIL_SIZE // 2)
+
+
+def test_small_images_are_not_upscaled(tmp_path):
+    path = save_image(tmp_path, "small.png", (64, 32), "PNG")
+    thumbnail, _ = _make_thumbnail(path, THUMBNAIL_SIZE)
+    with Image.open(io.BytesIO(thumbnail)) as img:
+        assert img.size == (64, 32)
+
+
+def test_non_image_is_rejected(tmp_path):
+    path = tmp_path / "notes.png"
+    path.write_bytes(b"definitely not an image")
+    with pytest.raises(INVALID_IMAGE_ERRORS):
+        _make_thumbnail(str(path), THUMBNAIL_SIZE)
+
+
+def test_unsupported_format_is_rejected_whatever_its_name(tmp_path):
+    path = save_image(tmp_path, "avatar.png", (32, 32), "TIFF")
+    with pytest.raises(INVALID_IMAGE_ERRORS):
+        _make_thumbnail(path, THUMBNAIL_SIZE)
+
+
+def test_oversized_dimensions_are_rejected(tmp_path):
+    # 1-bit PNG keeps the file tiny while declaring more pixels than allowed
+    side = int(MAX_AVATAR_PIXELS ** 0.5) + 1
+    path = save_image(tmp_path, "bomb.png", (side, side), "PNG", mode="1")
+    with pytest.raises(INVALID_IMAGE_ERRORS):
+        _make_thumbnail(path, THUMBNAIL_SIZE)
@@ -5,8 +5,7 @@ from utils.jwt_handler import verify_token
 
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+async def get_user_from_token(token: str):
     payload = verify_token(token)
 
     if payload.get("type") != "access":
@@ -21,3 +20,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise HTTPException(status_code=401, detail="User not found")
 
     return {"id": user.get("id"), "name": user.get("name", ""), "email": user.get("email")}
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await get_user_from_token(credentials.credentials)
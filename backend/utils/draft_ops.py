@@ -0,0 +1,65 @@
+MAX_OPS_PER_MESSAGE = 200
+
+# Splice offsets are UTF-16 code units, matching JavaScript string indices in the editor
+_ENCODING = "utf-16-le"
+_UNIT = 2
+
+
+def apply_ops(title, content, ops, max_bytes=None):
+    """
+    Apply a batch of edit ops to (title, content) and return the new pair.
+    Nothing is modified in place, so a ValueError on any op leaves the
+    caller's state untouched. `max_bytes` caps the UTF-8 size of the result.
+    """
+    if not isinstance(ops, list) or not ops:
+        raise ValueError("ops must be a non-empty list")
+    if len(ops) > MAX_OPS_PER_MESSAGE:
+        raise ValueError(f"At most {MAX_OPS_PER_MESSAGE} ops per message")
+
+    # Content is kept UTF-16 encoded and spliced in place for the whole batch, then decoded once
+    units = bytearray(content.encode(_ENCODING, "surrogatepass")) if isinstance(content, str) else None
+
+    for op in ops:
+        if not isinstance(op, dict):
+            raise ValueError("Each op must be an object")
+
+        kind = op.get("type")
+        if kind == "splice":
+            if units is None:
+                raise ValueError("Draft content is not text; send a replace op first")
+            index, delete, insert = op.get("index"), op.get("delete", 0), op.get("insert", "")
+            if type(index) is not int or type(delete) is not int or not isinstance(insert, str):
+                raise ValueError("splice requires integer index/delete and string insert")
+            if index < 0 or delete < 0 or (index + delete) * _UNIT > len(units):
+                raise ValueError("splice is out of range")
+            start, end = index * _UNIT, (index + delete) * _UNIT
+            units[start:end] = insert.encode(_ENCODING, "surrogatepass")
+        elif kind == "title":
+            if not isinstance(op.get("value"), str):
+                raise ValueError("title requires a string value")
+            title = op["value"]
+        elif kind == "replace":
+            if not isinstance(op.get("content"), str):
+                raise ValueError("replace requires string content")
+            units = bytearray(op["content"].encode(_ENCODING, "surrogatepass"))
+        else:
+            raise ValueError(f"Unknown op type: {kind}")
+
+        # Cheap early exit: UTF-8 is never less than half the UTF-16 size
+        if max_bytes is not None and units is not None and len(units) > 2 * max_bytes:
+            raise ValueError(f"Draft would exceed the {max_bytes} byte limit")
+
+    if units is not None:
+        try:
+            content = units.decode(_ENCODING)
+        except UnicodeDecodeError:
+            raise ValueError("Edit leaves an unpaired UTF-16 surrogate")
+
+    if max_bytes is not None:
+        size = len(title.encode("utf-8"))
+        if isinstance(content, str):
+            size += len(content.encode("utf-8"))
+        if size > max_bytes:
+            raise ValueError(f"Draft would exceed the {max_bytes} byte limit")
+
+    return title, content
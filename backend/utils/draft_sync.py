@@ -0,0 +1,246 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pymongo.errors import DocumentTooLarge, WriteError
+from config import DRAFT_MAX_BYTES
+from db.connection import db
+from utils.draft_ops import apply_ops
+
+FLUSH_INTERVAL = 2.0  # seconds an edit may sit in memory before it is persisted
+FLUSH_MAX_OPS = 100  # unpersisted ops that force an inline flush (backpressure)
+
+DRAFT_FIELDS = {"id": 1, "authorId": 1, "title": 1, "content": 1, "revision": 1}
+
+# Server-side "BSONObjectTooLarge" codes; like DocumentTooLarge, retrying can never succeed
+_TOO_LARGE_CODES = (10334, 17419)
+
+
+def _is_permanent(error: Exception) -> bool:
+    return isinstance(error, DocumentTooLarge) or (
+        isinstance(error, WriteError) and error.code in _TOO_LARGE_CODES
+    )
+
+
+def _revision_filter(revision: int):
+    # Posts written before draft sync existed have no revision field
+    return revision if revision else {"$in": [0, None]}
+
+
+class DraftClient:
+    """One socket attached to a session. `stale` means its view predates a reload from Mongo."""
+
+    def __init__(self):
+        self.stale = False
+
+
+class DraftSession:
+    """
+    In-memory state for one open draft, shared by every socket this worker
+    has open on it. Edits are applied here and written to db.posts in batches.
+    Writes are conditional on the last persisted revision, so a PATCH or a
+    session in another worker that wrote first causes a reload, not an overwrite.
+    """
+
+    def __init__(self, post: dict):
+        self.post_id = post.get("id")
+        self.author_id = post.get("authorId")
+        self.closed = None  # reason the session can no longer be used, sent to clients
+        self.clients = set()
+        self._load(post)
+        self._dirty = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher = None
+
+    def _load(self, post: dict):
+        self.title = post.get("title", "")
+        self.content = post.get("content", "")
+        self.revision = post.get("revision") or 0
+        self.persisted_revision = self.revision
+        self.pending_ops = 0
+
+    @property
+    def is_persisted(self) -> bool:
+        return self.persisted_revision == self.revision
+
+    @property
+    def needs_flush(self) -> bool:
+        return self.pending_ops >= FLUSH_MAX_OPS
+
+    def snapshot(self, kind: str) -> dict:
+        return {
+            "type": kind,
+            "rev": self.revision,
+            "title": self.title,
+            "content": self.content
+        }
+
+    def apply(self, ops) -> int:
+        """Apply a batch of ops atomically and return the new revision; raises ValueError on bad ops"""
+        self.title, self.content = apply_ops(self.title, self.content, ops, max_bytes=DRAFT_MAX_BYTES)
+        self.revision += 1
+        self.pending_ops += len(ops)
+        self._dirty.set()
+        return self.revision
+
+    async def flush(self):
+        async with self._flush_lock:
+            if self.is_persisted:
+                return
+
+            revision, title, content, ops = self.revision, self.title, self.content, self.pending_ops
+            try:
+                result = await db.posts.update_one(
+                    {
+                        "id": self.post_id,
+                        "authorId": self.author_id,
+                        "revision": _revision_filter(self.persisted_revision)
+                    },
+                    {"$set": {
+                        "title": title,
+                        "content": content,
+                        "revision": revision,
+                        "updatedAt": datetime.utcnow()
+                    }}
+                )
+            except Exception as e:
+                if not _is_permanent(e):
+                    raise
+                print(f"ERROR draft {self.post_id} can never be saved: {str(e)}", file=sys.stderr)
+                self._close("Draft is too large to save; unsaved edits were discarded")
+                return
+
+            if result.matched_count == 0:
+                await self._reload()
+                return
+
+            self.persisted_revision = revision
+            self.pending_ops -= ops
+
+    async def _reload(self):
+        # Someone else wrote first: their version wins and our unpersisted edits are dropped
+        post = await db.posts.find_one({"id": self.post_id, "authorId": self.author_id}, projection=DRAFT_FIELDS)
+        if post:
+            self._load(post)
+            self._dirty.clear()
+            for client in self.clients:
+                client.stale = True
+        else:
+            self._close("Post not found")
+
+    def _close(self, reason: str):
+        # Drops unsaved edits so nothing is retried; clients are told on their next message
+        self.closed = reason
+        self.persisted_revision = self.revision
+        self.pending_ops = 0
+        self._dirty.clear()
+
+    async def _run_flusher(self):
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self._dirty.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.schedule_flush()
+                print(f"ERROR flushing draft {self.post_id}: {str(e)}", file=sys.stderr)
+                continue
+
+            # Kept alive after the last disconnect only to retry a failed flush
+            if not self.clients and self.is_persisted:
+                self._flusher = None
+                await _release(self)
+                return
+
+    def schedule_flush(self):
+        self._dirty.set()
+
+    def start(self):
+        self._flusher = asyncio.create_task(self._run_flusher())
+
+    def cancel_flusher(self):
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+
+
+_sessions: dict[str, DraftSession] = {}
+_post_locks: dict[str, asyncio.Lock] = {}
+_post_lock_users: dict[str, int] = {}
+
+
+@asynccontextmanager
+async def _post_lock(post_id: str):
+    """Serializes open/close for one draft only; other drafts never wait on it"""
+    lock = _post_locks.setdefault(post_id, asyncio.Lock())
+    _post_lock_users[post_id] = _post_lock_users.get(post_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _post_lock_users[post_id] -= 1
+        if not _post_lock_users[post_id]:
+            del _post_lock_users[post_id]
+            del _post_locks[post_id]
+
+
+async def _release(session: DraftSession):
+    async with _post_lock(session.post_id):
+        if session.clients:
+            # Someone reattached while the flusher was exiting
+            session.start()
+        elif _sessions.get(session.post_id) is session:
+            del _sessions[session.post_id]
+
+
+async def open_session(post_id: str, user_id: str):
+    """Attach to the draft's session, loading it from Mongo if this worker has none; (None, None) if not found"""
+    async with _post_lock(post_id):
+        session = _sessions.get(post_id)
+
+        if session is None or session.closed:
+            post = await db.posts.find_one({"id": post_id, "authorId": user_id}, projection=DRAFT_FIELDS)
+            if not post:
+                return None, None
+            session = DraftSession(post)
+            session.start()
+            _sessions[post_id] = session
+        elif session.author_id != user_id:
+            return None, None
+
+        client = DraftClient()
+        session.clients.add(client)
+        return session, client
+
+
+async def close_session(session: DraftSession, client: DraftClient):
+    # Holding the per-post lock through the final flush keeps a new
+    # open_session for this draft from loading pre-flush state from Mongo
+    async with _post_lock(session.post_id):
+        session.clients.discard(client)
+        if session.clients:
+            return
+
+        try:
+            await session.flush()
+        except Exception as e:
+            # Leave the session registered; its flusher retries and releases it once saved
+            print(f"ERROR flushing draft {session.post_id}: {str(e)}", file=sys.stderr)
+            session.schedule_flush()
+            return
+
+        session.cancel_flusher()
+        if _sessions.get(session.post_id) is session:
+            del _sessions[session.post_id]
+
+
+async def close_all_sessions():
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session in sessions:
+        session.cancel_flusher()
+        try:
+            await session.flush()
+        except Exception as e:
+            print(f"ERROR flushing draft {session.post_id}: {str(e)}", file=sys.stderr)
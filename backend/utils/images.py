@@ -0,0 +1,85 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+THUMBNAIL_SIZE = 256
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_CONTENT_TYPE = "image/webp"
+
+# Formats accepted for avatars, keyed by what Pillow detects (not what the client declares)
+AVATAR_FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif"
+}
+
+# Far below Pillow's default (~89M), which only errors at twice that; plenty for a 256px avatar
+MAX_AVATAR_PIXELS = 25_000_000
+
+# Errors raised by Pillow for files that are not (safe) images
+INVALID_IMAGE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError)
+
+_pool = None
+
+
+def _make_thumbnail(path: str, size: int):
+    """
+    Runs inside a worker process: decode the image at `path` and return
+    (WEBP thumbnail bytes, MIME type of the detected source format).
+    """
+    with Image.open(path) as img:
+        # Both checks only read the header, before any pixel data is decoded
+        if img.format not in AVATAR_FORMATS:
+            raise UnidentifiedImageError(f"Unsupported image format: {img.format}")
+        if img.width * img.height > MAX_AVATAR_PIXELS:
+            raise Image.DecompressionBombError(f"Image is too large: {img.width}x{img.height}")
+
+        content_type = AVATAR_FORMATS[img.format]
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img.thumbnail((size, size))
+
+        buffer = io.BytesIO()
+        img.save(buffer, format=THUMBNAIL_FORMAT, quality=85)
+        return buffer.getvalue(), content_type
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the uvicorn worker already runs Motor and executor threads
+        _pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    if _pool is not None:
+        _discard_pool(_pool)
+
+
+async def generate_thumbnail(path: str, size: int = THUMBNAIL_SIZE):
+    """
+    Generate a thumbnail in the process pool so decoding never blocks the event loop;
+    returns (thumbnail bytes, detected MIME type). A pool whose worker died is replaced before BrokenProcessPool is re-raised.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    try:
+        return await loop.run_in_executor(pool, _make_thumbnail, path, size)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise